@@ -1,6 +0,0 @@
-""" Tally is a tool for the quantum-enhanced composition of generative art. """
-
-__version__ = '0.0.1'
-
-from tally.composition import Composition, Horizontal, Vertical, H, V, e
-from tally.functor import n_params, functor, evaluate
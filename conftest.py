@@ -0,0 +1,3 @@
+from importlib.util import find_spec
+
+collect_ignore = [] if find_spec("jax") else ["tally/functor_jax.py"]
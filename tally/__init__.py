@@ -2,5 +2,8 @@
 
 __version__ = '0.0.1'
 
-from tally.composition import Composition, Horizontal, Vertical, H, V, e
-from tally.functor import n_params, functor, evaluate
+from tally.composition import (
+    Composition, Label, Horizontal, Vertical, H, V, e)
+from tally.functor import (
+    n_params, functor, evaluate, evaluate_async, evaluate_batch, simulate,
+    multistart)
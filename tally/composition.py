@@ -12,10 +12,18 @@ Example
 
 from __future__ import annotations
 
-import json
-import random
+from random import Random
 from enum import Enum
-from dataclasses import dataclass, asdict
+from itertools import chain
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+from weakref import WeakValueDictionary
+
+try:
+    from orjson import loads
+except ImportError:  # pragma: no cover
+    from json import loads
 
 from discopy.monoidal import PRO
 from discopy.markov import Box, Diagram
@@ -34,7 +42,11 @@ Horizontal, Vertical, Empty = Label
 
 Label.__call__ = lambda self, *terms: Composition(*terms, label=self)
 
-@dataclass(frozen=True)
+# Maps (label, *ids of terms) to the unique composition with that label and
+# terms. Terms are interned and kept alive by the value, so their ids are safe.
+_INTERN: WeakValueDictionary = WeakValueDictionary()
+
+@dataclass(frozen=True, init=False)
 class Composition:
     """
     A composition is a list of terms, which are themselves compositions.
@@ -49,6 +61,10 @@ class Composition:
     The operator ``|`` does binary `Horizontal` composition while ``&``
     does binary `Vertical` composition, shortened to ``H`` and ``V``.
 
+    Compositions are interned, i.e. equal compositions are the same object.
+
+    >>> assert H(e, V(e, e)) is e | e & e
+
     Examples
     --------
     >>> assert H(H(e, e), H(e, e), H(e, e))\\
@@ -81,25 +97,48 @@ class Composition:
     .. image:: /_static/three-by-two.png
         :align: center
     """
+    __slots__ = (
+        "terms", "label", "_depth", "_arity", "_hash", "_repr", "_diagram",
+        "__weakref__")
+
     terms: tuple[Composition, ...]
     label: Label
 
-    def __init__(self, *terms: Composition, label: Label = Empty):
-        assert (terms and label in [Horizontal, Vertical]
-                or not terms and label == Empty)
-        labels = set(t.label for t in terms)
-        lengths = set(len(t.terms) for t in terms)
-        if len(labels) == len(lengths) == 1:
-            label_of_each, length_of_each = labels.pop(), lengths.pop()
-            if label == label_of_each:
-                terms = tuple(sum([t.terms for t in terms], ()))
-            if (label, label_of_each) == (Horizontal, Vertical):
-                label = Vertical
-                terms = tuple(
-                    Horizontal(*[terms[j].terms[i] for j in range(len(terms))])
-                    for i in range(length_of_each))
-        object.__setattr__(self, "terms", terms)
-        object.__setattr__(self, "label", label)
+    def __new__(cls, *terms: Composition, label: Label = Empty):
+        assert (terms and (label is Horizontal or label is Vertical)
+                or not terms and label is Empty)
+        if terms:
+            label_of_each, length_of_each = terms[0].label, len(terms[0].terms)
+            if all(t.label is label_of_each and len(t.terms) == length_of_each
+                   for t in terms):
+                if label is label_of_each:
+                    terms = tuple(chain.from_iterable(t.terms for t in terms))
+                elif label is Horizontal and label_of_each is Vertical:
+                    label = Vertical
+                    terms = tuple(Horizontal(*column)
+                                  for column in zip(*(t.terms for t in terms)))
+        key = (label, *map(id, terms))
+        self = _INTERN.get(key)
+        if self is not None:
+            return self
+        self = object.__new__(cls)
+        depth, arity = 0, len(terms)
+        for term in terms:
+            if term._depth >= depth:
+                depth = term._depth + 1
+            if term._arity > arity:
+                arity = term._arity
+        set_attr = object.__setattr__
+        set_attr(self, "terms", terms)
+        set_attr(self, "label", label)
+        set_attr(self, "_depth", depth)
+        set_attr(self, "_arity", arity)
+        set_attr(self, "_hash", hash(key))
+        _INTERN[key] = self
+        return self
+
+    def __reduce__(self):
+        return self.label, self.terms
 
     def __or__(self, other):
         return Horizontal(self, other)
@@ -107,21 +146,42 @@ class Composition:
     def __and__(self, other):
         return Vertical(self, other)
 
+    def __hash__(self):
+        return self._hash
+
     def __repr__(self):
-        if not self.terms:
-            return self.label.value
-        if len(self.terms) == 2:
-            symbol = '|' if self.label == Horizontal else '&'
-            return f"({self.terms[0]} {symbol} {self.terms[1]})"
-        return f"{self.label.value}{self.terms}"
+        if hasattr(self, "_repr"):
+            return self._repr
+        parts, stack = [], [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif hasattr(node, "_repr"):
+                parts.append(node._repr)
+            elif not node.terms:
+                parts.append(node.label.value)
+            elif len(node.terms) == 2:
+                symbol = ' | ' if node.label is Horizontal else ' & '
+                parts.append('(')
+                stack.extend((')', node.terms[1], symbol, node.terms[0]))
+            else:
+                parts.append(node.label.value + '(')
+                stack.append(',)' if len(node.terms) == 1 else ')')
+                for i in reversed(range(len(node.terms))):
+                    stack.append(node.terms[i])
+                    if i:
+                        stack.append(', ')
+        object.__setattr__(self, "_repr", ''.join(parts))
+        return self._repr
 
     @property
     def depth(self):
-        return max([0] + [t.depth + 1 for t in self.terms])
+        return self._depth
 
     @property
     def max_arity(self):
-        return max([len(self.terms)] + [t.max_arity for t in self.terms])
+        return self._arity
 
     def to_diagram(self) -> Diagram:
         """
@@ -135,27 +195,78 @@ class Composition:
         .. image:: /_static/diagram.png
             :center:
         """
-        if not self.terms:
-            return Diagram.id(1)
-        return Box(self.label.value, len(self.terms), 1)\
-            << Diagram.id().tensor(*(term.to_diagram() for term in self.terms))
+        def combine(node, diagrams):
+            if not hasattr(node, "_diagram"):
+                diagram = Diagram.id(1) if not node.terms\
+                    else diagrams[0].tensor(*diagrams[1:])\
+                    >> Box(node.label.value, len(node.terms), 1)
+                object.__setattr__(node, "_diagram", diagram)
+            return node._diagram
+        return fold(self, combine, terms=lambda node: () if hasattr(
+            node, "_diagram") else node.terms)
+
+    def _iter_json(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif not node.terms:
+                yield '{"terms": [], "label": "%s"}' % node.label.value
+            else:
+                yield '{"terms": ['
+                stack.append('], "label": "%s"}' % node.label.value)
+                for i in reversed(range(len(node.terms))):
+                    stack.append(node.terms[i])
+                    if i:
+                        stack.append(", ")
+
+    def to_json(self) -> str:
+        """
+        Encode a composition as a JSON string, without building its dict.
+
+        Example
+        -------
+        >>> composition = e | e & e
+        >>> assert Composition.from_json(composition.to_json()) is composition
+        """
+        return "".join(self._iter_json())
+
+    @staticmethod
+    def from_json(data: str | bytes) -> Composition:
+        return Composition.from_dict(loads(data))
 
     def save(self, path):
         with open(path, "w+") as file:
-            file.write(json.dumps(asdict(self)))
+            file.writelines(self._iter_json())
 
     @staticmethod
     def load(path):
-        with open(path, "r") as file:
-            return Composition.from_dict(json.loads(file.read()))
+        with open(path, "rb") as file:
+            return Composition.from_json(file.read())
+
+    def to_dict(self) -> dict:
+        """
+        Encode a composition as nested dictionaries of labels and terms.
+
+        Example
+        -------
+        >>> composition = e | e & e
+        >>> assert Composition.from_dict(composition.to_dict()) is composition
+        """
+        return fold(self, lambda node, terms: {
+            "terms": terms, "label": node.label.value})
 
     @staticmethod
-    def from_dict(tree):
-        return Label(tree['label'])(*map(Composition.from_dict, tree['terms']))
+    def from_dict(tree: dict) -> Composition:
+        return fold(
+            tree, lambda node, terms: Label(node['label'])(*terms),
+            terms=lambda node: node['terms'])
 
     @staticmethod
     def random(seed=None, max_trials=10, prob_empty=.25,
-               min_depth=2, max_depth=4, max_arity=3):
+               min_depth=2, max_depth=4, max_arity=3,
+               rng: Random | None = None):
         """
         Generate a random composition.
 
@@ -166,6 +277,7 @@ class Composition:
             min_depth : Minimum depth of a composition.
             max_depth : Maximum depth of a composition.
             max_arity : Maximum number of terms at each level.
+            rng : Random number generator, if given then ``seed`` is ignored.
 
         Example
         -------
@@ -174,23 +286,68 @@ class Composition:
         .. image:: /_static/random.png
             :center:
         """
-        if seed is not None:
-            random.seed(seed)
-        if not max_depth or not min_depth and random.random() <= prob_empty:
+        rng = Random(seed) if rng is None else rng
+
+        def is_empty(min_depth, max_depth):
+            return not max_depth\
+                or not min_depth and rng.random() <= prob_empty
+
+        def generate(min_depth, max_depth):
+            # Yields the arguments for each term, gets sent the term back.
+            for _ in range(max_trials):
+                cls = Horizontal if rng.random() < .5 else Vertical
+                n_terms = rng.randrange(2, max_arity)
+                terms = []
+                for _ in range(n_terms):
+                    terms.append((yield (None, max_depth - 1)))
+                result = cls(*terms)
+                if result._arity > max_arity\
+                        or result._depth < (min_depth or 0):
+                    continue
+                return result
+            raise RuntimeError
+
+        if is_empty(min_depth, max_depth):
             return Composition()
-        for trial in range(max_trials):
-            cls, n_terms = map(random.choice, (
-                [Horizontal, Vertical], range(2, max_arity)))
-            result = cls(*[Composition.random(
-                    seed=None if seed is None else hash((seed, i, trial)),
-                    min_depth=None,
-                    max_depth=max_depth - 1,
-                    prob_empty=prob_empty) for i in range(n_terms)])
-            if result.max_arity > max_arity or result.depth < (min_depth or 0):
+        stack, result = [generate(min_depth, max_depth)], None
+        while stack:
+            try:
+                args = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
                 continue
-            return result
-        raise RuntimeError
+            if is_empty(*args):
+                result = Composition()
+            else:
+                stack.append(generate(*args))
+                result = None
+        return result
+
+def fold(tree: Any, combine: Callable,
+         terms: Callable = lambda node: node.terms) -> Any:
+    """
+    Fold a tree bottom-up without recursion.
+
+    Parameters:
+        tree : The root of the tree, e.g. a composition.
+        combine : Called on each node with the list of results for its terms.
+        terms : Called on each node to get its terms, by default ``.terms``.
 
+    Note
+    ----
+    Results are memoised by node identity, so shared subterms are folded once.
+    """
+    results, stack = {}, deque([(tree, False)])
+    while stack:
+        node, visited = stack.pop()
+        if visited:
+            results[id(node)] = combine(
+                node, [results[id(term)] for term in terms(node)])
+        elif id(node) not in results:
+            stack.append((node, True))
+            stack.extend((term, False) for term in terms(node))
+    return results[id(tree)]
 
 Composition.to_graph, Composition.draw = to_graph, draw
 H, V, e = Horizontal, Vertical, Empty()
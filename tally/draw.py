@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import NamedTuple
 
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 
 
 class PlaneGraph(NamedTuple):
@@ -19,26 +24,85 @@ class PlaneGraph(NamedTuple):
 PlaneGraph.position.__doc__ = "The mapping from nodes to planar coordinates."
 PlaneGraph.graph.__doc__ = "The graph."
 
+CORNERS = np.array([(0., 0.), (0., 1.), (1., 1.), (1., 0.)])
+EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 0)])
 
-def to_graph(composition: Composition) -> PlaneGraph:
+# Maps figure sizes to the figure and axes reused by :func:`draw`.
+FIGURES: dict[tuple[float, float], tuple[Figure, Axes]] = dict()
+
+
+def layout(composition: Composition) -> np.ndarray:
     """
-    Compile a composition as a graph with positions in the unit square.
+    Compute the corners of the frames of a composition in the unit square.
+
+    Each empty term is drawn as a frame, placed by composing the affine maps
+    ``(x, y) -> (x0 + scale_x * x, y0 + scale_y * y)`` from the root down.
+
+    Returns:
+        points : An array of shape ``(n_frames, 4, 2)``.
     """
     from tally.composition import Horizontal
-    if not composition.terms:
-        graph = nx.Graph(zip(range(4), [1, 2, 3, 0]))
-        position = dict(enumerate([
-            (0., 0.), (0., 1.), (1., 1.), (1., 0.)]))
-        return graph, position
-    graph, position, n_terms = nx.Graph(), dict(), len(composition.terms)
-    for i, (G, p) in enumerate([term.to_graph() for term in composition.terms]):
-        for v, (x, y) in p.items():
-            if composition.label is Horizontal:
-                position[v + len(graph)] = ((i + x) / n_terms, y)
+    if composition.depth == 1:
+        return strip(composition.label, len(composition.terms))
+    frames = []
+    stack = [(composition, (1., 1., 0., 0.))]
+    while stack:
+        node, frame = stack.pop()
+        if not node.terms:
+            frames.append(frame)
+            continue
+        scale_x, scale_y, x0, y0 = frame
+        n_terms = len(node.terms)
+        for i in reversed(range(n_terms)):
+            if node.label is Horizontal:
+                frame = (
+                    scale_x / n_terms, scale_y, x0 + scale_x * i / n_terms, y0)
             else:
-                position[v + len(graph)] = (x, 1 - (i + y) / n_terms)
-        graph = nx.disjoint_union(graph, G)
-    return graph, position
+                frame = (
+                    scale_x, -scale_y / n_terms,
+                    x0, y0 + scale_y * (1 - i / n_terms))
+            stack.append((node.terms[i], frame))
+    frames = np.array(frames)
+    return frames[:, None, 2:] + frames[:, None, :2] * CORNERS
+
+
+@lru_cache(maxsize=128)
+def strip(label: Label, n_terms: int) -> np.ndarray:
+    """
+    Compute the corners of ``n_terms`` empty frames side by side or stacked.
+
+    Parameters:
+        label : Either `Horizontal` or `Vertical`.
+        n_terms : The number of frames.
+
+    Returns:
+        points : A read-only array of shape ``(n_terms, 4, 2)``.
+    """
+    from tally.composition import Horizontal
+    frames = np.zeros((n_terms, 4))
+    if label is Horizontal:
+        frames[:, :2] = 1 / n_terms, 1.
+        frames[:, 2] = np.arange(n_terms) / n_terms
+    else:
+        frames[:, :2] = 1., -1 / n_terms
+        frames[:, 3] = 1 - np.arange(n_terms) / n_terms
+    points = frames[:, None, 2:] + frames[:, None, :2] * CORNERS
+    points.setflags(write=False)
+    return points
+
+
+def to_graph(composition: Composition) -> PlaneGraph:
+    """
+    Compile a composition as a graph with positions in the unit square.
+
+    Each empty term is drawn as a frame of four nodes.
+    """
+    points = layout(composition)
+    edges = 4 * np.arange(len(points))[:, None, None] + EDGES
+    graph = nx.Graph()
+    graph.add_edges_from(edges.reshape(-1, 2).tolist())
+    return PlaneGraph(graph, dict(enumerate(
+        map(tuple, points.reshape(-1, 2).tolist()))))
 
 
 def draw(composition: Composition,
@@ -49,17 +113,39 @@ def draw(composition: Composition,
     Parameters:
         path : Optional file path, if ``None`` then call ``plt.show()``.
         figsize : Passed to ``plt.figure``.
+
+    Note
+    ----
+    When saving to a file, the figure for each ``figsize`` is created once and
+    reused across calls.
     """
-    plt.figure(figsize=figsize)
-    graph, position = to_graph(composition)
-    nx.draw_networkx(graph, pos=position, with_labels=False, node_size=0)
-    plt.tight_layout()
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.margins(0)
-    plt.gca().set_aspect('equal')
+    if path is None:
+        figure, axes = setup(plt.figure(figsize=figsize))
+    else:
+        figsize = tuple(figsize)
+        if figsize not in FIGURES:
+            FIGURES[figsize] = setup(Figure(figsize=figsize))
+        figure, axes = FIGURES[figsize]
+        for collection in axes.collections:
+            collection.remove()
+    segments = layout(composition)[:, EDGES].reshape(-1, 2, 2)
+    axes.add_collection(LineCollection(segments, colors='k', linewidths=1.))
     if path is None:
         plt.show()
     else:
-        plt.savefig(path)
-        plt.close()
+        figure.savefig(path)
+
+
+def setup(figure: Figure) -> tuple[Figure, Axes]:
+    """
+    Add axes for the unit square to a figure, without ticks or margins.
+    """
+    axes = figure.add_subplot()
+    axes.tick_params(
+        axis="both", which="both", bottom=False, left=False,
+        labelbottom=False, labelleft=False)
+    figure.tight_layout()
+    axes.set_xlim(0, 1)
+    axes.set_ylim(0, 1)
+    axes.set_aspect('equal')
+    return figure, axes
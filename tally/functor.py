@@ -1,47 +1,306 @@
 """ Functor from :class:`Composition` to parameterised quantum circuits. """
 
+import asyncio
+from copy import deepcopy
+from functools import lru_cache, reduce
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
 from discopy.monoidal import PRO
 from discopy.markov import Diagram, Box, Functor, Category
-from discopy.quantum import qubit, Ty, Circuit, Discard, Bra, IQPansatz
+from discopy.quantum import (
+    qubit, Ty, Circuit, Discard, Ket, Bra, CRz, IQPansatz)
+
+from tally.composition import fold
 
 MAX_ARITY = 3
 WIDTH, DEPTH = 1, 3
 
-def ansatz(params):
-    n_qubits = params.shape[1] + 1
+@lru_cache(maxsize=None)
+def template(shape):
+    """
+    The ansatz for parameters of a given shape, built once with zero phases.
+    """
+    n_qubits = shape[1] + 1
     left, right = (n_qubits - WIDTH) // 2, (n_qubits - WIDTH + 1) // 2
-    return IQPansatz(n_qubits, params)\
+    return IQPansatz(n_qubits, np.zeros(shape))\
         >> Discard(left) @ qubit ** WIDTH @ Discard(right)
 
+def ansatz(params):
+    """
+    The ansatz for some parameters, i.e. its template with each controlled
+    rotation replaced, without composing and tensoring the circuit again.
+    """
+    circuit, phases = template(params.shape), iter(np.ravel(params))
+    layers = tuple(
+        type(layer)(layer.boxes_or_types[0], CRz(next(phases)),
+                    layer.boxes_or_types[2])
+        if isinstance(layer.boxes_or_types[1], CRz) else layer
+        for layer in circuit.inside)
+    return Circuit(layers, circuit.dom, circuit.cod, _scan=False)
+
 boxes = [Box(label, PRO(arity), PRO(1))
          for label in "HV" for arity in range(2, MAX_ARITY + 1)]
 param_shapes = {box: (DEPTH, len(box.dom) * WIDTH - 1) for box in boxes}
-n_params = sum(i * j for i, j in param_shapes.values())
+offsets = np.cumsum([0] + [i * j for i, j in param_shapes.values()]).tolist()
+param_slices = {
+    box: slice(start, stop)
+    for box, start, stop in zip(boxes, offsets, offsets[1:])}
+n_params = offsets[-1]
 
 def flatten(box_to_params):
-    return np.concatenate([box_to_params[box].flatten() for box in boxes])
+    return np.concatenate([np.ravel(box_to_params[box]) for box in boxes])
 
 def unflatten(params):
-    params = np.array(params)
-    box_to_params, scan = {}, 0
-    for box in boxes:
-        i, j = param_shapes[box]
-        box_to_params[box] = params[scan:][:i * j].reshape(i, j)
-        scan += i * j
-    return box_to_params
+    """ Split a parameter vector into views of shape ``param_shapes``. """
+    params = np.asarray(params)
+    return {box: params[param_slices[box]].reshape(param_shapes[box])
+            for box in boxes}
+
+class Ansatz(Functor):
+    """
+    The functor sending each box to its :func:`ansatz` at some parameters.
+
+    Parameters:
+        params : A vector of ``n_params`` numbers or symbols.
+    """
+    def __init__(self, params):
+        self.params, box_to_params = params, unflatten(params)
+        super().__init__(
+            ob={PRO(1): qubit ** WIDTH},
+            ar={box: ansatz(box_to_params[box]) for box in boxes},
+            cod=Category(Ty, Circuit))
 
 def functor(params):
-    box_to_params = unflatten(params)
-    return Functor(
-        ob={PRO(1): qubit ** WIDTH},
-        ar={box: ansatz(box_to_params[box]) for box in boxes},
-        cod=Category(Ty, Circuit))
+    """
+    The functor for a given parameter vector.
+
+    Numeric functors are cached by parameter values, so that evaluating many
+    compositions at the same parameters builds the ansatz circuits only once.
+    Functors for symbolic parameters, e.g. sympy symbols, are not cached.
+    """
+    params = np.asarray(params)
+    if params.dtype == object:
+        return Ansatz(params)
+    return _functor(params.astype(float).tobytes())
+
+@lru_cache(maxsize=16)
+def _functor(key):
+    return Ansatz(np.frombuffer(key))
+
+@lru_cache(maxsize=None)
+def symbolic():
+    """
+    The sympy symbols ``theta0``, ``theta1``, etc. and the functor for them.
+
+    These are built on first use, so that sympy is only needed with pytket.
+    """
+    import sympy
+    symbols = sympy.symbols(f"theta:{n_params}")
+    return symbols, Ansatz(np.array(symbols, dtype=object))
+
+@lru_cache(maxsize=1024)
+def to_tk(composition, compilation=None):
+    """
+    The pytket circuit of a composition, with a symbol for each parameter.
+
+    Compositions are interned, so the circuit is built, converted and compiled
+    once per composition and each evaluation only substitutes the symbols.
+    Passes are compared by identity, so the same pass should be given each
+    time, e.g. the one from :func:`default_compilation`.
+    """
+    _, F = symbolic()
+    circuit = (F(composition.to_diagram()) >> Bra(*WIDTH * [0])).to_tk()
+    if compilation is not None:
+        compilation.apply(circuit)
+    return circuit
+
+@lru_cache(maxsize=None)
+def default_compilation(backend):
+    return backend.default_compilation_pass()
+
+@lru_cache(maxsize=1024)
+def compile_composition(composition):
+    """
+    Compile a composition to a function from parameter vectors to circuits.
+
+    The circuit is built once with symbols, then each call only replaces the
+    layers with a controlled rotation, i.e. there is no tree traversal and no
+    functor application.
+    """
+    symbols, F = symbolic()
+    circuit = F(composition.to_diagram()) >> Bra(*WIDTH * [0])
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    slots = [
+        (i, type(layer), left, index[box.phase], right)
+        for i, layer in enumerate(circuit.inside)
+        for left, box, right in [layer.boxes_or_types[:3]]
+        if isinstance(box, CRz)]
+    def build(params):
+        layers = list(circuit.inside)
+        for i, cls, left, j, right in slots:
+            layers[i] = cls(left, CRz(params[j]), right)
+        return Circuit(tuple(layers), circuit.dom, circuit.cod, _scan=False)
+    return build
+
+def to_circuit(F, composition):
+    """ The circuit of a functor on a composition, post-selected on zero. """
+    if isinstance(F, Ansatz):
+        return compile_composition(composition)(F.params)
+    return F(composition.to_diagram()) >> Bra(*WIDTH * [0])
 
 def evaluate(F, composition, backend=None, compilation=None):
+    return evaluate_batch([F], [composition], backend, compilation)[0]
+
+async def evaluate_async(F, composition, backend=None, compilation=None):
+    """
+    Evaluate a functor on a composition in a worker thread.
+
+    Independent evaluations can then run concurrently, e.g. with
+    ``await asyncio.gather(*(evaluate_async(F, c, backend) for c in data))``.
+    """
+    return await asyncio.to_thread(
+        evaluate, F, composition, backend, compilation)
+
+def evaluate_batch(functors, compositions, backend=None, compilation=None):
+    """
+    Evaluate each functor on the corresponding composition.
+
+    With a backend, all the circuits are compiled and submitted together,
+    with one call to ``backend.process_circuits``. For functors built with
+    :func:`functor`, the compiled circuits are taken from :func:`to_tk`.
+    Without a backend, these functors are evaluated with :func:`simulate`
+    and other functors with a numpy simulation of their circuit.
+    """
     if compilation is None:
         compilation = None if backend is None\
-            else backend.default_compilation_pass()
-    circuit = F(composition.to_diagram()) >> Bra(*WIDTH * [0])
-    return float(circuit.eval(backend=backend, compilation=compilation))
+            else default_compilation(backend)
+    if backend is not None and all(isinstance(F, Ansatz) for F in functors):
+        symbols, circuits = symbolic()[0], []
+        for F, composition in zip(functors, compositions):
+            circuit = deepcopy(to_tk(composition, compilation))
+            circuit.symbol_substitution(dict(zip(symbols, F.params)))
+            circuits.append(circuit)
+        if not circuits:
+            return []
+        counts = circuits[0].get_counts(*circuits[1:], backend=backend)
+        return [float(result.get((), 0)) for result in counts]
+    if backend is None:
+        return [simulate(F.params, composition) if isinstance(F, Ansatz)
+                else float(run(to_circuit(F, composition)))
+                for F, composition in zip(functors, compositions)]
+    circuits = list(map(to_circuit, functors, compositions))
+    if not circuits:
+        return []
+    results = circuits[0].eval(
+        *circuits[1:], backend=backend, compilation=compilation)
+    return list(map(float, results if len(circuits) > 1 else [results]))
+
+def run(circuit):
+    """ Evaluate a circuit on qubits initialised to zero, with numpy. """
+    result = (Ket(*len(circuit.dom) * [0]) >> circuit).eval(mixed=True)
+    return result.array.real
+
+HADAMARD = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
+
+@lru_cache(maxsize=None)
+def hadamards(n_qubits):
+    """ The matrix of ``n_qubits`` parallel Hadamard gates. """
+    return reduce(np.kron, n_qubits * [HADAMARD])
+
+@lru_cache(maxsize=None)
+def controls(n_qubits):
+    """
+    The exponents of a layer of controlled Z rotations, i.e. an array with
+    entry ``b[i] * (2 * b[i + 1] - 1)`` for each bitstring ``b`` and ``i``.
+    """
+    bits = (np.arange(2 ** n_qubits)[:, None]
+            >> np.arange(n_qubits)[::-1]) & 1
+    return bits[:, :-1] * (2 * bits[:, 1:] - 1)
+
+def unitary(params, xp=np):
+    """ The matrix of ``IQPansatz(n_qubits, params)`` using module ``xp``. """
+    n_qubits = params.shape[1] + 1
+    result = xp.eye(2 ** n_qubits)
+    for layer in params:
+        result = xp.exp(1j * xp.pi * controls(n_qubits) @ layer)[:, None]\
+            * (hadamards(n_qubits) @ result)
+    return result
+
+@lru_cache(maxsize=1024)
+def contraction(composition):
+    """
+    The order in which to contract the boxes of a composition, as a tuple of
+    pairs of a label and the indices of its terms in the tuple, if any.
+    Shared subterms appear only once.
+    """
+    order = []
+    def combine(node, indices):
+        order.append((node.label.value, tuple(indices)))
+        return len(order) - 1
+    fold(composition, combine)
+    return tuple(order)
+
+def state(params, composition, xp=np):
+    """
+    The density matrix of the qubits output by a composition.
+
+    The circuit of a composition is a tree: each box acts on the states of its
+    terms, which are on disjoint qubits, then discards all but ``WIDTH`` of
+    them. So we contract density matrices along the tree rather than
+    simulating the whole circuit.
+    """
+    unitaries = {
+        (box.name, len(box.dom)):
+        unitary(params[param_slices[box]].reshape(param_shapes[box]), xp)
+        for box in boxes}
+    zero, states = xp.diag(xp.eye(2 ** WIDTH)[0]), []
+    for label, indices in contraction(composition):
+        if not indices:
+            states.append(zero)
+            continue
+        matrix = unitaries[label, len(indices)]
+        rho = matrix @ reduce(xp.kron, [states[i] for i in indices])\
+            @ matrix.conj().T
+        n_qubits = len(indices) * WIDTH
+        left = (n_qubits - WIDTH) // 2
+        shape = (2 ** left, 2 ** WIDTH, 2 ** (n_qubits - WIDTH - left))
+        states.append(xp.einsum('aibajb->ij', rho.reshape(2 * shape)))
+    return states[-1]
+
+def simulate(params, composition):
+    """
+    Evaluate a composition at some parameters with no shot noise.
+
+    This is the same quantity as :func:`evaluate` on an ideal backend, computed
+    with :func:`state` without building any circuit.
+
+    Example
+    -------
+    >>> from tally import H, V, e
+    >>> assert np.isclose(simulate(np.zeros(n_params), V(e, e) | e & e), 1)
+    """
+    return float(state(np.asarray(params), composition)[0, 0].real)
+
+def multistart(minimize, loss, n_starts, seed=None, max_workers=None):
+    """
+    Minimise a loss from many random initial parameters in parallel.
+
+    Parameters:
+        minimize : Called as ``minimize(loss, params0)`` in a worker process,
+                   e.g. ``functools.partial(noisyopt.minimizeSPSA, niter=7)``.
+        loss : The loss, which needs to be picklable. Backends are not safe
+               to share between processes, each process should create its own.
+        n_starts : The number of initial parameter vectors.
+        seed : Random seed for the initial parameters.
+        max_workers : Passed to ``ProcessPoolExecutor``.
+
+    Returns:
+        result : The result of ``minimize`` with the lowest ``fun``.
+    """
+    params0 = np.random.default_rng(seed).random((n_starts, n_params))
+    with ProcessPoolExecutor(max_workers) as executor:
+        results = list(executor.map(minimize, repeat(loss), params0))
+    return min(results, key=lambda result: result.fun)
@@ -0,0 +1,44 @@
+"""
+Simulation of :mod:`tally.functor` with JAX.
+
+This runs :func:`tally.functor.state` with :mod:`jax.numpy` arrays, so that
+the loss of a composition can be compiled with :func:`jax.jit` once and then
+evaluated on new parameters with no circuit construction at all.
+
+Example
+-------
+>>> from tally import H, V, e
+>>> from tally.functor import n_params
+>>> composition = V(e, e, e) | e & H(e, e & e)
+>>> params = jax.numpy.zeros(n_params)
+>>> assert jax.numpy.isclose(evaluate(params, composition), 1)
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import jax
+import jax.numpy as jnp
+
+from tally.composition import Composition
+from tally.functor import state
+
+@lru_cache(maxsize=1024)
+def probability(composition: Composition):
+    """
+    Compile the function from parameters to the probability of measuring
+    zero on the output of a composition.
+    """
+    return jax.jit(lambda params: state(params, composition, jnp)[0, 0].real)
+
+
+def evaluate(params: jnp.ndarray, composition: Composition) -> jnp.ndarray:
+    """
+    Evaluate a composition with the IQP ansatz at some parameters.
+
+    This is the same quantity as :func:`tally.functor.evaluate` on an ideal
+    backend, i.e. with no shot noise. Use :func:`jax.vmap` to evaluate a batch
+    of parameter vectors, e.g. the shifts of one SPSA step, in one call.
+    """
+    return probability(composition)(params)
@@ -1,6 +1,21 @@
 import os
+import random
+import asyncio
+from copy import deepcopy
+from importlib.util import find_spec
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
 from matplotlib.testing.compare import compare_images
-from tally import H, V, e
+from discopy.markov import Functor
+from discopy.quantum import qubit, Ket, Bra, Discard, IQPansatz
+
+from tally import Composition, H, V, e
+from tally.functor import (
+    n_params, param_shapes, ansatz, functor, evaluate, evaluate_async,
+    evaluate_batch, simulate, symbolic, to_tk, compile_composition,
+    multistart)
 
 
 def test_repr():
@@ -25,3 +40,109 @@ def test_json(true_path="test/example.json"):
     assert composition.load(test_path)\
         == composition.load(true_path) == composition
     os.remove(test_path)
+
+def test_dict(depth=5000):
+    composition = e
+    for i in range(depth):
+        composition = composition | e if i % 2 else composition & e
+    assert composition.depth == depth
+    assert Composition.from_dict(composition.to_dict()) is composition
+
+def test_random(seed=42):
+    state = random.getstate()
+    composition = Composition.random(seed=seed)
+    assert random.getstate() == state
+    assert composition is Composition.random(rng=random.Random(seed))
+    assert 2 <= composition.depth <= 4 and composition.max_arity <= 3
+
+def test_ansatz(seed=42):
+    rng = np.random.default_rng(seed)
+    for shape in set(param_shapes.values()):
+        params, n_qubits = rng.random(shape), shape[1] + 1
+        left, right = (n_qubits - 1) // 2, n_qubits // 2
+        assert ansatz(params) == IQPansatz(n_qubits, params)\
+            >> Discard(left) @ qubit @ Discard(right)
+
+def test_functor_symbolic():
+    sympy = pytest.importorskip("sympy")
+    symbols = sympy.symbols(f"x:{n_params}")
+    circuit = functor(symbols)((V(e, e) | e & e).to_diagram())
+    assert circuit.free_symbols <= set(symbols) and circuit.free_symbols
+
+def test_to_tk(seed=42):
+    pytest.importorskip("pytket")
+    params = np.random.default_rng(seed).random(n_params)
+    for composition in [V(e, e) | e & e, H(e, V(e, e, e))]:
+        circuit = deepcopy(to_tk(composition))
+        circuit.symbol_substitution(dict(zip(symbolic()[0], params)))
+        diagram = functor(params)(composition.to_diagram()) >> Bra(0)
+        assert circuit == diagram.to_tk()
+
+def test_compile_composition(seed=42, n_compositions=5):
+    pytest.importorskip("sympy")
+    params = np.random.default_rng(seed).random(n_params)
+    for i in range(n_compositions):
+        composition = Composition.random(seed=seed + i)
+        assert compile_composition(composition)(params)\
+            == functor(params)(composition.to_diagram()) >> Bra(0)
+
+def test_evaluate(seed=42):
+    params = np.random.default_rng(seed).random(n_params)
+    F = functor(params)
+    G = Functor(ob=F.ob, ar=F.ar, cod=F.cod)
+    for composition in [V(e, e) | e & e, H(e, V(e, e, e))]:
+        assert np.isclose(evaluate(F, composition), evaluate(G, composition))
+
+def test_simulate(seed=42, n_samples=2):
+    rng = np.random.default_rng(seed)
+    for composition in [V(e, e) | e & e, e & (e | e) & e]:
+        for params in rng.random((n_samples, n_params)):
+            circuit = functor(params)(composition.to_diagram()) >> Bra(0)
+            circuit = Ket(*len(circuit.dom) * [0]) >> circuit
+            expected = circuit.eval(mixed=True).array.real
+            assert np.isclose(simulate(params, composition), expected)
+            if find_spec("jax"):
+                from tally.functor_jax import evaluate as evaluate_jax
+                assert np.isclose(
+                    evaluate_jax(params, composition), expected, atol=1e-6)
+
+def test_evaluate_batch(seed=42):
+    pytest.importorskip("pytket")
+    from discopy.quantum.tk import mockBackend
+    backend = mockBackend(
+        {(0, ): 300, (1, ): 700}, {(0, ): 10, (1, ): 90}, {(1, ): 5})
+    params = np.random.default_rng(seed).random(n_params)
+    F = functor(params)
+    G = Functor(ob=F.ob, ar=F.ar, cod=F.cod)
+    compositions = [V(e, e) | e & e, H(e, V(e, e, e)), e & (e | e) & e]
+    circuits = [F(composition.to_diagram()) >> Bra(0)
+                for composition in compositions]
+    expected = [float(result) for result in circuits[0].eval(
+        *circuits[1:], backend=backend)]
+    assert expected == [.3, .1, 0]
+    assert evaluate_batch(3 * [F], compositions, backend) == expected
+    assert evaluate_batch([F, G, F], compositions, backend) == expected
+
+def test_evaluate_async(seed=42):
+    F = functor(np.random.default_rng(seed).random(n_params))
+    compositions = [V(e, e) | e & e, H(e, V(e, e, e)), e & (e | e) & e]
+    async def gather():
+        return await asyncio.gather(*(
+            evaluate_async(F, composition) for composition in compositions))
+    assert asyncio.run(gather()) == [
+        evaluate(F, composition) for composition in compositions]
+
+def minimize(loss, params0):
+    return SimpleNamespace(x=params0, fun=loss(params0))
+
+def loss(params):
+    return simulate(params, V(e, e) | e & e)
+
+# The workers only run numpy, so forking after jax was imported is safe here.
+@pytest.mark.filterwarnings("ignore:os.fork:RuntimeWarning")
+def test_multistart(seed=42):
+    result = multistart(minimize, loss, n_starts=2, seed=seed, max_workers=1)
+    params0 = np.random.default_rng(seed).random((2, n_params))
+    losses = list(map(loss, params0))
+    assert losses[0] != losses[1] and result.fun == min(losses)
+    assert np.array_equal(result.x, params0[np.argmin(losses)])